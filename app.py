@@ -2,8 +2,9 @@
 Aplicação de Consulta de Processos Judiciais - Refatorado com Padrão MVC
 Ponto de entrada principal da aplicação
 """
-import re
+import uuid
 import streamlit as st
+from collections import Counter
 from datetime import datetime
 
 # Configuration
@@ -11,7 +12,7 @@ from config.settings import MAX_HISTORY_ITEMS
 
 # Models
 from models.auth import AuthenticationManager
-from models.predictus_api import PredictusAPI
+from models.predictus_api import get_api
 
 # Controllers
 from controllers.csv_processor import CSVProcessor
@@ -29,14 +30,16 @@ from utils.file_storage import FileStorage
 
 def initialize_session_state():
     """Inicializa variáveis de estado da sessão"""
+    # Fábricas em vez de valores: o histórico só é lido do disco uma vez por sessão
     defaults = {
-        'resultados': None,
-        'historico_pesquisas': FileStorage.load_search_history()
+        'resultados': lambda: None,
+        'process_details': dict,
+        'historico_pesquisas': FileStorage.load_search_history
     }
 
-    for key, value in defaults.items():
+    for key, factory in defaults.items():
         if key not in st.session_state:
-            st.session_state[key] = value
+            st.session_state[key] = factory()
 
 
 def render_search_interface():
@@ -183,12 +186,11 @@ def render_bulk_search_tab():
 
 def perform_search(search_input: str):
     """Realiza pesquisa baseada na entrada"""
-    api = st.session_state.get('api') or PredictusAPI()
-    st.session_state.api = api
+    api = get_api()
 
     with st.spinner("Pesquisando processos..."):
         if CPFValidator.is_cpf(search_input):
-            cpf = re.sub(r'\D', '', search_input)
+            cpf = CPFValidator.digits_only(search_input)
             st.info(f"Pesquisando por CPF: {cpf}")
             results = api.search_by_cpf(cpf)
             search_type, display_term = "CPF", cpf
@@ -200,27 +202,32 @@ def perform_search(search_input: str):
     st.session_state.resultados = results
     st.session_state.last_search_term = display_term
 
-    if results is not None:
-        search_info = {
-            'termo': display_term,
-            'tipo': search_type,
-            'data_hora': datetime.now().strftime('%d/%m/%Y %H:%M'),
-            'total_processos': len(results),
-            'resultados': results
-        }
+    if results is None:
+        st.error("❌ Falha na consulta à API. Verifique as credenciais ou tente novamente.")
+        return
 
-        st.session_state.historico_pesquisas.insert(0, search_info)
-        if len(st.session_state.historico_pesquisas) > MAX_HISTORY_ITEMS:
-            st.session_state.historico_pesquisas = st.session_state.historico_pesquisas[:MAX_HISTORY_ITEMS]
+    search_info = {
+        'termo': display_term,
+        'tipo': search_type,
+        'data_hora': datetime.now().strftime('%d/%m/%Y %H:%M'),
+        'total_processos': len(results),
+        'resultados': results
+    }
 
-        if FileStorage.save_search_history(st.session_state.historico_pesquisas):
-            st.success("✅ Pesquisa salva no histórico permanente!")
+    st.session_state.historico_pesquisas.insert(0, search_info)
+    if len(st.session_state.historico_pesquisas) > MAX_HISTORY_ITEMS:
+        # Os arquivos de resultados ficam: o histórico em disco ainda lista essas
+        # pesquisas (e outras sessões também); são removidos na compactação
+        st.session_state.historico_pesquisas = st.session_state.historico_pesquisas[:MAX_HISTORY_ITEMS]
+    FileStorage.invalidate_process_index()
+
+    if FileStorage.append_search(search_info):
+        st.success("✅ Pesquisa salva no histórico permanente!")
 
 
 def perform_bulk_search(cpf_list: list):
     """Realiza pesquisa em lote de CPFs"""
-    api = st.session_state.get('api') or PredictusAPI()
-    st.session_state.api = api
+    api = get_api()
 
     # Criar gerenciador de pesquisa em lote
     bulk_manager = BulkSearchManager(api)
@@ -243,7 +250,8 @@ def perform_bulk_search(cpf_list: list):
     progress_bar.empty()
     status_text.empty()
 
-    # Armazenar resultados
+    # Armazenar resultados (o id identifica esta pesquisa nos caches da visualização)
+    results['search_id'] = uuid.uuid4().hex
     st.session_state.bulk_results = results
 
     # Exibir resumo
@@ -269,25 +277,17 @@ def render_search_results():
     st.markdown("---")
 
     # Estatísticas
-    courts = {}
-    total_value = 0
-
-    for proc in results:
-        court = proc.get('tribunal', 'N/A')
-        courts[court] = courts.get(court, 0) + 1
-
-        value = proc.get('valorCausa', {}).get('valor', 0)
-        if value:
-            try:
-                total_value += float(value)
-            except (ValueError, TypeError):
-                pass
+    courts = Counter(proc.get('tribunal', 'N/A') for proc in results)
+    total_value = sum(
+        DataFormatter.parse_number(proc.get('valorCausa', {}).get('valor'))
+        for proc in results
+    )
 
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Total", len(results))
     with col2:
-        main_court = max(courts, key=courts.get) if courts else "N/A"
+        main_court = courts.most_common(1)[0][0] if courts else "N/A"
         st.metric("Tribunal Principal", main_court)
     with col3:
         st.metric("Valor Total", DataFormatter.format_currency(total_value))
@@ -296,7 +296,7 @@ def render_search_results():
     st.subheader("📋 Processos Encontrados")
 
     for i, process in enumerate(results):
-        ProcessViewComponents.render_process_details(process, i)
+        ProcessViewComponents.render_process_details(process, i, "individual")
 
 
 def render_sidebar():
@@ -364,12 +364,24 @@ def render_search_history():
 
 def reopen_search(search: dict):
     """Reabre uma pesquisa salva"""
-    st.session_state.resultados = search['resultados']
+    results = FileStorage.load_search_results(search)
+    if results is None:
+        # Removida do histórico por outra sessão: descarta a entrada obsoleta
+        history = st.session_state.historico_pesquisas
+        history[:] = [s for s in history if s is not search]
+        FileStorage.invalidate_process_index()
+        st.warning(f"A pesquisa '{search['termo']}' não está mais disponível e foi removida do histórico.")
+        return
+
+    st.session_state.resultados = results
 
     # Carregar detalhes salvos
     details_processes = search.get('detalhes_processos', {})
+    process_details = st.session_state.process_details
     for process_number, details in details_processes.items():
-        st.session_state[f"detalhes_{process_number}"] = details
+        # Ordenadas uma vez aqui; a renderização reaproveita a ordem
+        details['movimentos'] = ProcessViewComponents.sort_movements(details.get('movimentos', []))
+        process_details[process_number] = details
 
     details_count = len(details_processes)
     if details_count > 0:
@@ -383,6 +395,8 @@ def reopen_search(search: dict):
 def delete_search(search: dict, index: int):
     """Deleta uma pesquisa do histórico"""
     st.session_state.historico_pesquisas.pop(index)
+    FileStorage.invalidate_process_index()
+    FileStorage.delete_payload(search)
 
     if FileStorage.save_search_history(st.session_state.historico_pesquisas):
         st.success(f"✅ Pesquisa '{search['termo']}' deletada do histórico!")
@@ -8,14 +8,36 @@ from pathlib import Path
 # Paths
 HIST_PATH = Path(os.getenv("STREAMLIT_HOME", ".")) / "data"
 HIST_PATH.mkdir(parents=True, exist_ok=True)
-HIST_FILE = HIST_PATH / "historico_pesquisas.json"
+HIST_FILE = HIST_PATH / "historico_pesquisas.jsonl"
+LEGACY_HIST_FILE = HIST_PATH / "historico_pesquisas.json"
+HIST_PAYLOAD_PATH = HIST_PATH / "historico_payloads"
+HIST_PAYLOAD_PATH.mkdir(parents=True, exist_ok=True)
 
 # Constants
 MAX_HISTORY_ITEMS = 50
+HISTORY_SAVE_DEBOUNCE = 0.2  # seconds
 REQUEST_TIMEOUT = 30
 
 # API Configuration
 PREDICTUS_BASE_URL = "https://api.predictus.com.br"
+PREDICTUS_TOKEN_TTL = 3500
+
+# Bulk Search
+BULK_SEARCH_MAX_WORKERS = 8
+
+# Process Details
+DETAILS_FETCH_MAX_WORKERS = 4
+DETAILS_CACHE_TTL = 24 * 60 * 60  # seconds
+DETAILS_CACHE_MAX_ITEMS = 1000
+MOVEMENTS_PAGE_SIZE = 25
+
+# HTTP connection pool of the shared API client: room for a few concurrent
+# bulk searches plus the details pool
+API_POOL_MAXSIZE = 4 * BULK_SEARCH_MAX_WORKERS + DETAILS_FETCH_MAX_WORKERS
+
+# Search Result Cache
+SEARCH_CACHE_TTL = 3600
+SEARCH_CACHE_MAX_ITEMS = 10_000
 
 # File Upload Limits
 MAX_FILE_SIZE_MB = 10
@@ -2,8 +2,9 @@
 Controlador de Pesquisa em Lote
 Gerencia pesquisas em lote de CPFs e agregação de resultados
 """
-import pandas as pd
-from typing import Dict, List, Callable
+import csv
+import io
+from typing import Dict, List, Callable, Optional, TextIO
 from models.predictus_api import PredictusAPI
 from utils.data_helpers import DataFormatter
 
@@ -11,69 +12,99 @@ from utils.data_helpers import DataFormatter
 class BulkSearchManager:
     """Gerencia pesquisas em lote de CPFs e agregação de resultados"""
 
-    def __init__(self, api: PredictusAPI):
+    def __init__(self, api: Optional[PredictusAPI] = None, results: Optional[Dict] = None):
+        # Sem `api`, o gerenciador apenas resume/exporta `results` já existentes
         self.api = api
-        self.results = {
+        self.results = results if results is not None else {
             'nada_consta': [],
             'found_processes': {},
             'errors': []
         }
+        self._counters = self._count_results(self.results)
+
+    @staticmethod
+    def _count_results(results: Dict) -> Dict[str, int]:
+        """Conta os resultados existentes (usado apenas na construção)"""
+        found = results['found_processes']
+        return {
+            'total_searched': len(results['nada_consta']) + len(found) + len(results['errors']),
+            'nada_consta': len(results['nada_consta']),
+            'with_processes': len(found),
+            'total_processes': sum(len(procs) for procs in found.values()),
+            'errors': len(results['errors'])
+        }
 
     def search_cpf_list(self, cpf_list: List[str], progress_callback: Callable = None) -> Dict:
         """Pesquisa múltiplos CPFs e categoriza resultados"""
         total = len(cpf_list)
+        outcomes = {}
+
+        # Requisições concorrentes; o progresso avança conforme cada CPF termina
+        for done, (cpf, future) in enumerate(self.api.search_by_cpfs(cpf_list), start=1):
+            try:
+                outcomes[cpf] = future.result()
+            except Exception as e:
+                outcomes[cpf] = e
 
-        for idx, cpf in enumerate(cpf_list):
             # Atualizar progresso
             if progress_callback:
-                progress_callback(idx + 1, total, cpf)
+                progress_callback(done, total, cpf)
 
-            try:
-                # Pesquisar por CPF
-                results = self.api.search_by_cpf(cpf)
-
-                if results is None:
-                    self.results['errors'].append({
-                        'cpf': cpf,
-                        'error': 'Falha na requisição da API'
-                    })
-                elif len(results) == 0:
-                    # Nada consta
-                    self.results['nada_consta'].append(cpf)
-                else:
-                    # Processos encontrados
-                    self.results['found_processes'][cpf] = results
+        # Categorizar na ordem original da lista, mantendo os contadores do resumo
+        counters = self._counters
+        found = self.results['found_processes']
+        for cpf in cpf_list:
+            results = outcomes[cpf]
 
-            except Exception as e:
+            if isinstance(results, Exception):
+                self.results['errors'].append({
+                    'cpf': cpf,
+                    'error': str(results)
+                })
+                counters['errors'] += 1
+                counters['total_searched'] += 1
+            elif results is None:
                 self.results['errors'].append({
                     'cpf': cpf,
-                    'error': str(e)
+                    'error': 'Falha na requisição da API'
                 })
+                counters['errors'] += 1
+                counters['total_searched'] += 1
+            elif len(results) == 0:
+                # Nada consta
+                self.results['nada_consta'].append(cpf)
+                counters['nada_consta'] += 1
+                counters['total_searched'] += 1
+            else:
+                # Processos encontrados
+                previous = found.get(cpf)
+                if previous is None:
+                    counters['with_processes'] += 1
+                    counters['total_searched'] += 1
+                else:
+                    counters['total_processes'] -= len(previous)
+                found[cpf] = results
+                counters['total_processes'] += len(results)
 
         return self.results
 
     def get_summary(self) -> Dict[str, int]:
         """Obtém estatísticas resumidas da pesquisa em lote"""
-        return {
-            'total_searched': len(self.results['nada_consta']) + len(self.results['found_processes']) + len(self.results['errors']),
-            'nada_consta': len(self.results['nada_consta']),
-            'with_processes': len(self.results['found_processes']),
-            'total_processes': sum(len(procs) for procs in self.results['found_processes'].values()),
-            'errors': len(self.results['errors'])
-        }
+        return dict(self._counters)
 
-    def export_results_to_csv(self) -> str:
-        """Exporta resultados para formato CSV"""
-        rows = []
+    def _write_results_csv(self, out: TextIO) -> None:
+        """Escreve os resultados em formato CSV, linha a linha, em `out`"""
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(['CPF', 'Status', 'Total Processos', 'Detalhes'])
 
         # Nada consta
         for cpf in self.results['nada_consta']:
-            rows.append({
-                'CPF': DataFormatter.format_cpf(cpf),
-                'Status': 'Nada Consta',
-                'Total Processos': 0,
-                'Detalhes': 'Nenhum processo encontrado'
-            })
+            writer.writerow([
+                DataFormatter.format_cpf(cpf),
+                'Nada Consta',
+                0,
+                'Nenhum processo encontrado'
+            ])
 
         # Com processos
         for cpf, processes in self.results['found_processes'].items():
@@ -83,21 +114,27 @@ class BulkSearchManager:
                 tribunal = proc.get('tribunal', 'N/A')
                 process_details.append(f"{num} ({tribunal})")
 
-            rows.append({
-                'CPF': DataFormatter.format_cpf(cpf),
-                'Status': 'Processos Encontrados',
-                'Total Processos': len(processes),
-                'Detalhes': '; '.join(process_details)
-            })
+            writer.writerow([
+                DataFormatter.format_cpf(cpf),
+                'Processos Encontrados',
+                len(processes),
+                '; '.join(process_details)
+            ])
 
         # Erros
         for error in self.results['errors']:
-            rows.append({
-                'CPF': DataFormatter.format_cpf(error['cpf']),
-                'Status': 'Erro',
-                'Total Processos': 0,
-                'Detalhes': error['error']
-            })
-
-        df = pd.DataFrame(rows)
-        return df.to_csv(index=False)
+            writer.writerow([
+                DataFormatter.format_cpf(error['cpf']),
+                'Erro',
+                0,
+                error['error']
+            ])
+
+    def export_results_to_csv_bytes(self) -> bytes:
+        """Exporta resultados para CSV em UTF-8, gravando direto num buffer binário"""
+        buffer = io.BytesIO()
+        text = io.TextIOWrapper(buffer, encoding='utf-8', newline='', write_through=True)
+        self._write_results_csv(text)
+        data = buffer.getvalue()
+        text.close()
+        return data
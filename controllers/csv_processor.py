@@ -2,37 +2,43 @@
 Controlador de Processamento CSV
 Gerencia processamento de arquivos CSV e extração de CPFs
 """
-import pandas as pd
 import streamlit as st
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 from utils.data_helpers import CPFValidator
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class CSVProcessor:
     """Gerencia processamento de arquivos CSV e extração de CPFs"""
 
     @staticmethod
-    def extract_cpfs_from_dataframe(df: pd.DataFrame) -> List[str]:
+    def extract_cpfs_from_dataframe(df: "pd.DataFrame") -> List[str]:
         """Extrai todos os CPFs do DataFrame"""
-        all_cpfs = set()
-
-        for column in df.columns:
-            for value in df[column]:
-                cpfs = CPFValidator.extract_cpfs_from_text(str(value))
-                all_cpfs.update(cpfs)
+        # Junta as células de texto (sem NaN) e faz uma única varredura de regex
+        text = "\n".join(
+            df[column].dropna().astype(str).str.cat(sep="\n")
+            for column in df.columns
+        )
+        all_cpfs = set(CPFValidator.extract_cpfs_from_text(text))
 
-        return sorted(list(all_cpfs))
+        return sorted(all_cpfs)
 
     @staticmethod
-    def process_csv_file(uploaded_file) -> Tuple[List[str], pd.DataFrame]:
+    def process_csv_file(uploaded_file) -> Tuple[List[str], "pd.DataFrame"]:
         """Processa CSV enviado e extrai CPFs únicos"""
+        # Importado sob demanda: pandas só é necessário quando há upload de CSV
+        import pandas as pd
+
         try:
-            # Ler CSV com várias codificações
+            # Ler CSV com várias codificações, mantendo as células como texto
+            # (preserva zeros à esquerda e evita inferência de tipos numéricos)
             try:
-                df = pd.read_csv(uploaded_file, encoding='utf-8')
+                df = pd.read_csv(uploaded_file, encoding='utf-8', dtype=str)
             except UnicodeDecodeError:
                 uploaded_file.seek(0)
-                df = pd.read_csv(uploaded_file, encoding='latin-1')
+                df = pd.read_csv(uploaded_file, encoding='latin-1', dtype=str)
 
             # Extrair CPFs de todas as colunas
             unique_cpfs = CSVProcessor.extract_cpfs_from_dataframe(df)
@@ -3,6 +3,7 @@ Modelo de Autenticação
 Autenticação de usuários e gerenciamento de sessão
 """
 import hashlib
+import hmac
 import streamlit as st
 
 
@@ -19,7 +20,15 @@ class AuthenticationManager:
         """Verifica se as credenciais são válidas"""
         try:
             valid_users = st.secrets.get("USUARIOS_APP", {})
-            return username in valid_users and valid_users[username] == password
+            expected = valid_users.get(username)
+            if expected is None:
+                return False
+
+            # Compara os hashes em tempo constante (senhas seguem em texto nos secrets)
+            return hmac.compare_digest(
+                AuthenticationManager.hash_password(str(expected)),
+                AuthenticationManager.hash_password(password)
+            )
         except Exception as e:
             st.error(f"Erro ao verificar credenciais: {e}")
             return False
@@ -32,7 +41,7 @@ class AuthenticationManager:
     @staticmethod
     def logout() -> None:
         """Deslogar usuário"""
-        keys_to_clear = ['authenticated', 'username', 'login_time', 'api', 'resultados']
+        keys_to_clear = ['authenticated', 'username', 'login_time', 'resultados']
         for key in keys_to_clear:
             st.session_state.pop(key, None)
 
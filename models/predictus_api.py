@@ -2,10 +2,63 @@
 Predictus API Model
 Handles API communication with Predictus service
 """
+import logging
+import threading
+import time
 import requests
 import streamlit as st
-from typing import Dict, List, Optional
-from config.settings import PREDICTUS_BASE_URL, REQUEST_TIMEOUT
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from config.settings import (
+    PREDICTUS_BASE_URL, REQUEST_TIMEOUT, SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ITEMS,
+    BULK_SEARCH_MAX_WORKERS, PREDICTUS_TOKEN_TTL, API_POOL_MAXSIZE
+)
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=2048)
+def _normalize_name(name: str) -> str:
+    """Collapse whitespace and upper-case a party name as the API expects"""
+    return " ".join(name.split()).upper()
+
+
+@lru_cache(maxsize=1)
+def _get_credentials() -> Tuple[str, str]:
+    """Read the Predictus credentials from st.secrets once per process"""
+    return (
+        st.secrets.get("PREDICTUS_USERNAME", "motoristapx.teste"),
+        st.secrets.get("PREDICTUS_PASSWORD", ""),
+    )
+
+
+class PredictusAuthError(Exception):
+    """Raised when the Predictus /auth endpoint does not return a token"""
+
+
+@st.cache_resource(ttl=PREDICTUS_TOKEN_TTL, show_spinner=False)
+def _fetch_token(base_url: str, username: str, password: str, _session: requests.Session) -> str:
+    """Fetch an access token; shared by all sessions until the TTL expires"""
+    response = _session.post(
+        f"{base_url}/auth",
+        json={"username": username, "password": password},
+        timeout=REQUEST_TIMEOUT,
+    )
+
+    if response.status_code == 200:
+        token = (response.json() or {}).get("accessToken")
+        if not token:
+            raise PredictusAuthError("Authentication succeeded but no accessToken in response.")
+        return token
+
+    # Include the response body for debugging; failures are not cached
+    try:
+        err = response.json()
+    except ValueError:
+        err = response.text
+    raise PredictusAuthError(f"Authentication failed: {response.status_code} - {err}")
 
 
 class PredictusAPI:
@@ -14,42 +67,44 @@ class PredictusAPI:
     def __init__(self):
         self.base_url = PREDICTUS_BASE_URL
         self.token = None
-        self.username = st.secrets.get("PREDICTUS_USERNAME", "motoristapx.teste")
-        self.password = st.secrets.get("PREDICTUS_PASSWORD", "")
-        self._ua = {"User-Agent": "streamlit-app/1.0"}
-
-    def authenticate(self) -> bool:
-        """Authenticate with the API"""
-        try:
-            auth_url = f"{self.base_url}/auth"
-            payload = {"username": self.username, "password": self.password}
-            headers = {"Content-Type": "application/json", **self._ua}
+        self.username, self.password = _get_credentials()
 
-            response = requests.post(
-                auth_url, json=payload, headers=headers, timeout=REQUEST_TIMEOUT
-            )
+        # One keep-alive session per client: reuses TCP/TLS connections across calls.
+        # The client is shared by every session, so the pool is sized for that
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "User-Agent": "streamlit-app/1.0",
+        })
+        self.session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_MAXSIZE),
+        )
+        self._search_cache: Dict[Tuple[str, str], Tuple[float, List[Dict]]] = {}
+        # The instance is shared across sessions and worker threads (see get_api)
+        self._cache_lock = threading.Lock()
 
-            if response.status_code == 200:
-                data = response.json() or {}
-                self.token = data.get("accessToken")
-                if not self.token:
-                    st.error("Authentication succeeded but no accessToken in response.")
-                    return False
-                return True
-
-            # Log helpful context for debugging
-            try:
-                err = response.json()
-            except ValueError:
-                err = response.text
-            st.error(f"Authentication failed: {response.status_code} - {err}")
+    def authenticate(self, refresh: bool = False) -> bool:
+        """Authenticate with the API, reusing the shared token unless `refresh` is set"""
+        try:
+            token = _fetch_token(self.base_url, self.username, self.password, self.session)
+            if refresh and token == self.token:
+                # The shared token was just rejected; another caller may already
+                # have replaced it, otherwise drop it and fetch a new one
+                _fetch_token.clear()
+                token = _fetch_token(self.base_url, self.username, self.password, self.session)
+
+            self.token = token
+            return True
+
+        except PredictusAuthError as e:
+            logger.error("%s", e)
             return False
-
         except requests.exceptions.RequestException as e:
-            st.error(f"Network error during authentication: {e}")
+            logger.error("Network error during authentication: %s", e)
             return False
         except Exception as e:
-            st.error(f"Unexpected error during authentication: {e}")
+            logger.exception("Unexpected error during authentication: %s", e)
             return False
 
     def _make_request(self, endpoint: str, payload: Dict) -> Optional[Dict]:
@@ -58,22 +113,18 @@ class PredictusAPI:
             return None
 
         url = f"{self.base_url}{endpoint}"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.token}",
-            **self._ua,
-        }
+        headers = {"Authorization": f"Bearer {self.token}"}
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 url, json=payload, headers=headers, timeout=REQUEST_TIMEOUT
             )
 
             # Handle token expiration
             if response.status_code == 401:
-                if self.authenticate():
+                if self.authenticate(refresh=True):
                     headers["Authorization"] = f"Bearer {self.token}"
-                    response = requests.post(
+                    response = self.session.post(
                         url, json=payload, headers=headers, timeout=REQUEST_TIMEOUT
                     )
                 else:
@@ -98,33 +149,77 @@ class PredictusAPI:
                 err_body = response.json()
             except ValueError:
                 err_body = response.text
-            st.error(f"API request failed: {response.status_code} - {err_body}")
+            logger.warning("API request failed: %s - %s", response.status_code, err_body)
             return None
 
         except requests.exceptions.RequestException as e:
-            st.error(f"Network error: {e}")
+            logger.warning("Network error: %s", e)
             return None
         except Exception as e:
-            st.error(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             return None
 
+    def _cached_request(self, endpoint: str, field: str, value: str) -> Optional[List[Dict]]:
+        """Make a search request, reusing recent successful responses"""
+        key = (endpoint, value)
+        with self._cache_lock:
+            cached = self._search_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        # The lock is not held during the request itself
+        result = self._make_request(endpoint, {field: value})
+
+        # Only successful responses are cached; failures are retried next time
+        if result is not None:
+            with self._cache_lock:
+                if key not in self._search_cache and len(self._search_cache) >= SEARCH_CACHE_MAX_ITEMS:
+                    self._search_cache.pop(next(iter(self._search_cache)), None)
+                self._search_cache[key] = (time.monotonic() + SEARCH_CACHE_TTL, result)
+
+        return result
+
     def search_by_name(self, name: str) -> Optional[List[Dict]]:
         """Search processes by person name"""
-        return self._make_request(
+        return self._cached_request(
             "/predictus-api/processos/judiciais/buscarPorNomeParte",
-            {"nome": name.upper()}
+            "nome", _normalize_name(name)
         )
 
     def search_by_cpf(self, cpf: str) -> Optional[List[Dict]]:
         """Search processes by CPF"""
-        return self._make_request(
+        return self._cached_request(
             "/predictus-api/processos/judiciais/buscarPorCPFParte",
-            {"cpf": cpf}
+            "cpf", cpf
         )
 
+    def search_by_cpfs(
+        self, cpfs: List[str], max_workers: int = BULK_SEARCH_MAX_WORKERS
+    ) -> Iterator[Tuple[str, Future]]:
+        """Search several CPFs concurrently, yielding (cpf, future) as each completes"""
+        # Authenticate once up front so workers don't all race to fetch a token
+        if not self.token:
+            self.authenticate()
+
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {pool.submit(self.search_by_cpf, cpf): cpf for cpf in cpfs}
+            for future in as_completed(futures):
+                yield futures[future], future
+        finally:
+            # If the consumer stops early (e.g. a Streamlit rerun raised from the
+            # progress callback), drop the queued lookups instead of waiting for them
+            pool.shutdown(wait=False, cancel_futures=True)
+
     def search_by_process_number(self, process_number: str) -> Optional[List[Dict]]:
-        """Search process by CNJ number"""
+        """Search process by CNJ number (not cached here: the details view caches it)"""
         return self._make_request(
             "/predictus-api/processos/judiciais/buscarPorNumeroCNJ",
             {"numeroProcessoUnico": process_number}
         )
+
+
+@st.cache_resource(show_spinner=False)
+def get_api() -> PredictusAPI:
+    """Shared Predictus client for all sessions (connection pool, token and search cache)"""
+    return PredictusAPI()
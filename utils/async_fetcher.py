@@ -0,0 +1,23 @@
+"""
+Async Fetcher
+Background thread pool for Predictus lookups
+"""
+import streamlit as st
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable
+from config.settings import DETAILS_FETCH_MAX_WORKERS
+
+
+@st.cache_resource(show_spinner=False)
+def get_fetch_pool() -> ThreadPoolExecutor:
+    """Thread pool shared by all sessions for background lookups"""
+    return ThreadPoolExecutor(max_workers=DETAILS_FETCH_MAX_WORKERS)
+
+
+def fetch_many(lookup: Callable[[str], Any], process_numbers: Iterable[str]) -> Dict[str, Future]:
+    """Submit several process-detail lookups at once, keyed by process number"""
+    pool = get_fetch_pool()
+    return {
+        number: pool.submit(lookup, number)
+        for number in dict.fromkeys(process_numbers)
+    }
@@ -4,9 +4,64 @@ Text processing, formatting, and validation utilities
 """
 import re
 import unicodedata
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 from typing import Any
 
+# Single-pass substitutions for typographic punctuation left after NFKC
+_TEXT_REPLACEMENTS = str.maketrans({
+    "\u2013": "-",    # en dash
+    "\u2014": "-",    # em dash
+    "\u2026": "...",  # ellipsis
+    "\u201c": '"',    # left double quotation mark
+    "\u201d": '"',    # right double quotation mark
+    "\u2018": "'",    # left single quotation mark
+    "\u2019": "'",    # right single quotation mark
+})
+
+_NON_DIGIT = re.compile(r'\D')
+
+# Swap thousands/decimal separators to the Brazilian convention in one pass
+_BR_NUMBER = str.maketrans(',.', '.,')
+
+# CPF as XXX.XXX.XXX-XX or XXXXXXXXXXX; the groups hold the digits only
+_CPF_RE = re.compile(r'\b(\d{3})\.?(\d{3})\.?(\d{3})-?(\d{2})\b')
+
+# Plain decimal number as returned by the API (e.g. "1500.00", "-3", "2e3")
+_NUMBER_RE = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+# Deletion table for every non-digit ASCII character (str.translate fast path)
+_ASCII_NON_DIGITS = str.maketrans('', '', ''.join(
+    chr(c) for c in range(128) if not chr(c).isdigit()
+))
+
+
+@lru_cache(maxsize=8192)
+def _clean_str(text: str) -> str:
+    """NFKC-normalize and replace typographic punctuation (memoized)"""
+    return unicodedata.normalize("NFKC", text).translate(_TEXT_REPLACEMENTS)
+
+
+@lru_cache(maxsize=8192)
+def _format_date_str(date_str: str) -> str:
+    """Reformat an ISO date string as DD/MM/YYYY (memoized)"""
+    # Fast path: a bare YYYY-MM-DD is reformatted by slicing once it is a real
+    # calendar date; anything longer (time parts) goes through fromisoformat
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-' and date_str.isascii():
+        year, month, day = date_str[:4], date_str[5:7], date_str[8:10]
+        if year.isdigit() and month.isdigit() and day.isdigit():
+            try:
+                date(int(year), int(month), int(day))
+            except ValueError:
+                return date_str
+            return f"{day}/{month}/{year}"
+
+    try:
+        parsed = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        return parsed.strftime('%d/%m/%Y')
+    except (ValueError, TypeError):
+        return date_str
+
 
 class DataFormatter:
     """Data formatting utilities"""
@@ -17,21 +72,7 @@ class DataFormatter:
         if not text:
             return str(text) if text is not None else ""
 
-        text = unicodedata.normalize("NFKC", str(text))
-        replacements = {
-            "–": "-",
-            "—": "-",
-            "…": "...",
-            """: '"',
-            """: '"',
-            "'": "'",
-            "'": "'",
-        }
-
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-
-        return text
+        return _clean_str(str(text))
 
     @staticmethod
     def format_cpf(cpf: str) -> str:
@@ -40,7 +81,7 @@ class DataFormatter:
             return ""
 
         # Remove all non-digit characters
-        cpf_digits = re.sub(r'\D', '', cpf)
+        cpf_digits = CPFValidator.digits_only(cpf)
 
         # Ensure 11 digits with zero-padding
         cpf_digits = cpf_digits.zfill(11)
@@ -59,33 +100,49 @@ class DataFormatter:
             return "Not informed"
 
         try:
-            return f"R$ {float(value):,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            return f"R$ {float(value):,.2f}".translate(_BR_NUMBER)
         except (ValueError, TypeError):
             return f"R$ {value}"
 
+    @staticmethod
+    def parse_number(value: Any) -> float:
+        """Parse a numeric value, returning 0.0 when missing or invalid"""
+        if not value:
+            return 0.0
+
+        # Type/format checks instead of a try/except frame per value
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str) and _NUMBER_RE.fullmatch(value.strip()):
+            return float(value)
+        return 0.0
+
     @staticmethod
     def format_date(date_str: Any) -> str:
         """Format date string"""
         if not date_str:
             return "Not informed"
 
-        try:
-            date = datetime.fromisoformat(str(date_str).replace('Z', '+00:00'))
-            return date.strftime('%d/%m/%Y')
-        except (ValueError, TypeError):
-            return str(date_str)
+        return _format_date_str(str(date_str))
 
 
 class CPFValidator:
     """CPF validation utilities"""
 
+    @staticmethod
+    def digits_only(text: str) -> str:
+        """Strip every non-digit character from text"""
+        digits = text.translate(_ASCII_NON_DIGITS)
+        # Only non-ASCII input (e.g. full-width digits) needs the regex
+        return digits if digits.isascii() else _NON_DIGIT.sub('', digits)
+
     @staticmethod
     def is_cpf(text: str) -> bool:
         """Check if text is a valid CPF format"""
         if not text:
             return False
 
-        cpf = re.sub(r'\D', '', text)
+        cpf = CPFValidator.digits_only(text)
         return len(cpf) == 11 and cpf != cpf[0] * 11
 
     @staticmethod
@@ -94,16 +151,11 @@ class CPFValidator:
         if not text:
             return []
 
-        # Pattern for CPF: XXX.XXX.XXX-XX or XXXXXXXXXXX
-        cpf_pattern = r'\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b'
-        matches = re.findall(cpf_pattern, str(text))
-
-        # Clean and validate CPFs
+        # Clean and validate CPFs (the capture groups already drop separators)
         valid_cpfs = []
-        for match in matches:
-            cpf = re.sub(r'\D', '', match)
-            if len(cpf) == 11 and cpf != cpf[0] * 11:  # Basic validation
-                # Ensure CPF is stored with leading zeros (11 digits)
-                valid_cpfs.append(cpf.zfill(11))
+        for match in _CPF_RE.finditer(str(text)):
+            cpf = ''.join(match.groups())
+            if cpf != cpf[0] * 11:  # Basic validation
+                valid_cpfs.append(cpf)
 
         return valid_cpfs
@@ -1,54 +1,288 @@
 """
 File Storage Utilities
-Handle JSON file operations for search history
+Handle JSON Lines file operations for search history
 """
 import json
+import logging
+import mmap
+import os
+import threading
+import uuid
 import streamlit as st
-from typing import List, Dict
-from config.settings import HIST_FILE
+from pathlib import Path
+from typing import Any, Iterator, List, Dict, Optional, Tuple
+from config.settings import (
+    HIST_FILE, HIST_PAYLOAD_PATH, LEGACY_HIST_FILE, MAX_HISTORY_ITEMS, HISTORY_SAVE_DEBOUNCE
+)
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Debounced history rewrites, one pending save per session
+_save_lock = threading.Lock()
+_pending_saves: Dict[str, Tuple[threading.Timer, List[Dict]]] = {}
+# Serializes every change to HIST_FILE (rewrites, appends, pending flushes)
+_write_lock = threading.RLock()
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize to compact single-line UTF-8 JSON bytes"""
+    if orjson is not None:
+        # Like the stdlib encoder, accept non-str dict keys (e.g. numeric ids)
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _iter_lines(path: Path) -> Iterator[bytes]:
+    """Yield the non-empty lines of a file through a read-only memory map"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                if line.strip():
+                    yield line
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _read_history_records(path: str, mtime_ns: int) -> List[Dict]:
+    """Parse the history file (oldest first); `mtime_ns` keys the cache to its version"""
+    return [_loads(line) for line in _iter_lines(Path(path))]
 
 
 class FileStorage:
-    """Handles file-based data persistence"""
+    """Handles file-based data persistence
+
+    History is stored as JSON Lines, oldest search first, so a new search
+    is a single appended line. In memory it is kept newest first.
+
+    Each line only holds search metadata; the (large) result list is written
+    once to its own payload file, referenced by `payload_ref`, and read back
+    on demand by `load_search_results`.
+    """
+
+    @staticmethod
+    def _payload_file(ref: str) -> Path:
+        """Path of the payload file for a history entry"""
+        return HIST_PAYLOAD_PATH / f"{ref}.json"
+
+    @staticmethod
+    def _to_index_record(search: Dict) -> Dict:
+        """Split the result payload out of a search, returning its index record"""
+        if 'resultados' not in search:
+            return search
+
+        if 'payload_ref' not in search:
+            ref = uuid.uuid4().hex
+            with open(FileStorage._payload_file(ref), 'wb') as f:
+                f.write(_dumps(search['resultados']))
+            search['payload_ref'] = ref
+            search['processos'] = [
+                process.get('numeroProcessoUnico') for process in search['resultados']
+            ]
+
+        return {key: value for key, value in search.items() if key != 'resultados'}
+
+    @staticmethod
+    def load_search_results(search: Dict) -> Optional[List[Dict]]:
+        """Load the result list of a history entry, reading its payload file if needed
+
+        Returns None when the payload file is gone: another session already
+        dropped the entry from the on-disk history, so it is stale here.
+        """
+        if 'resultados' not in search:
+            try:
+                with open(FileStorage._payload_file(search['payload_ref']), 'rb') as f:
+                    search['resultados'] = _loads(f.read())
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                st.error(f"Error loading search results: {e}")
+                return []
+
+        return search['resultados']
+
+    @staticmethod
+    def delete_payload(search: Dict) -> None:
+        """Remove the payload file of a history entry, if it has one"""
+        ref = search.get('payload_ref')
+        if ref:
+            FileStorage._payload_file(ref).unlink(missing_ok=True)
 
     @staticmethod
     def load_search_history() -> List[Dict]:
-        """Load search history from file"""
+        """Load search history from file (newest first)"""
+        FileStorage.invalidate_process_index()
         try:
             if HIST_FILE.exists():
-                with open(HIST_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # Re-parsed only when the file changes; cache_data hands back a copy
+                records = _read_history_records(str(HIST_FILE), HIST_FILE.stat().st_mtime_ns)
+
+                # Appends are never trimmed in place; compact here once too many accumulate
+                if len(records) > MAX_HISTORY_ITEMS:
+                    for search in records[:-MAX_HISTORY_ITEMS]:
+                        FileStorage.delete_payload(search)
+                    records = records[-MAX_HISTORY_ITEMS:]
+                    FileStorage.save_search_history(records[::-1])
+
+                return records[::-1]
+
+            if LEGACY_HIST_FILE.exists():
+                with open(LEGACY_HIST_FILE, 'rb') as f:
+                    history = _loads(f.read())
+                FileStorage.save_search_history(history)
+                return history
         except Exception as e:
             st.error(f"Error loading history: {e}")
 
         return []
 
+    @staticmethod
+    def _session_key() -> str:
+        """Identify the current session's pending save"""
+        return st.session_state.setdefault('_history_save_key', uuid.uuid4().hex)
+
     @staticmethod
     def save_search_history(history: List[Dict]) -> bool:
-        """Save search history to file"""
+        """Rewrite the whole history file from the in-memory list"""
+        with _write_lock:
+            # This list supersedes this session's debounced save, if still waiting
+            FileStorage._take_pending(FileStorage._session_key())
+            if FileStorage._write_history(history):
+                return True
+
+        st.error("Error saving history (see the log for details)")
+        return False
+
+    @staticmethod
+    def _write_history(history: List[Dict]) -> bool:
+        """Write the history index atomically; failures are logged (may run off the script thread)"""
         try:
-            with open(HIST_FILE, 'w', encoding='utf-8') as f:
-                json.dump(history, f, ensure_ascii=False, indent=2)
+            # Write a sibling temp file and swap it in, so readers never see a partial file
+            tmp_file = HIST_FILE.with_suffix('.tmp')
+            with _write_lock:
+                # One record encoded at a time; the 1 MiB buffer batches the write() calls
+                with open(tmp_file, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                    for search in reversed(history):
+                        f.write(_dumps(FileStorage._to_index_record(search)))
+                        f.write(b'\n')
+                os.replace(tmp_file, HIST_FILE)
+            return True
+        except Exception:
+            # Debounced saves run in a timer thread, where st.error would be dropped
+            logger.exception("Error saving history")
+            return False
+
+    @staticmethod
+    def schedule_save(history: List[Dict]) -> None:
+        """Rewrite the history shortly, coalescing saves requested in quick succession"""
+        key = FileStorage._session_key()
+        timer = threading.Timer(HISTORY_SAVE_DEBOUNCE, FileStorage._flush_pending, args=(key,))
+
+        with _save_lock:
+            previous = _pending_saves.get(key)
+            if previous is not None:
+                previous[0].cancel()
+            # Shallow copy: later list edits are not picked up, but in-place
+            # updates to the entries (e.g. new process details) are
+            _pending_saves[key] = (timer, list(history))
+            timer.start()
+
+    @staticmethod
+    def _take_pending(key: str) -> Optional[List[Dict]]:
+        """Cancel a session's scheduled save, returning the history it would have written"""
+        with _save_lock:
+            pending = _pending_saves.pop(key, None)
+        if pending is None:
+            return None
+
+        pending[0].cancel()
+        return pending[1]
+
+    @staticmethod
+    def _flush_pending(key: str) -> None:
+        """Write a session's scheduled history now, if its save is still pending"""
+        # Taken under the write lock, so an append can never slip in between
+        # claiming the pending history and replacing the file
+        with _write_lock:
+            history = FileStorage._take_pending(key)
+            if history is not None:
+                FileStorage._write_history(history)
+
+    @staticmethod
+    def append_search(search: Dict) -> bool:
+        """Append a single new search to the history file"""
+        try:
+            line = _dumps(FileStorage._to_index_record(search)) + b'\n'
+            with _write_lock:
+                # Land pending rewrites first so none of them can overwrite this line
+                with _save_lock:
+                    keys = list(_pending_saves)
+                for key in keys:
+                    FileStorage._flush_pending(key)
+
+                with open(HIST_FILE, 'ab') as f:
+                    f.write(line)
             return True
         except Exception as e:
             st.error(f"Error saving history: {e}")
             return False
 
+    @staticmethod
+    def _build_process_index(history: List[Dict]) -> Dict[str, Dict]:
+        """Map each process number to the newest search containing it"""
+        index = {}
+        for search in reversed(history):
+            if 'processos' in search:
+                numbers = search['processos']
+            else:
+                numbers = [p.get('numeroProcessoUnico') for p in search.get('resultados', [])]
+            for number in numbers:
+                index[number] = search
+        return index
+
+    @staticmethod
+    def invalidate_process_index() -> None:
+        """Drop the cached process index; call whenever the history list changes"""
+        st.session_state.pop('_proc_index', None)
+
+    @staticmethod
+    def _find_search(process_number: str, history: List[Dict]) -> Optional[Dict]:
+        """Find the search holding a process, through an index cached per history list"""
+        cached = st.session_state.get('_proc_index')
+        if cached is None or cached[0] != id(history):
+            cached = (id(history), FileStorage._build_process_index(history))
+            st.session_state['_proc_index'] = cached
+
+        return cached[1].get(process_number)
+
     @staticmethod
     def save_process_details(process_number: str, details: Dict, history: List[Dict]) -> bool:
-        """Save process details to history"""
+        """Record process details in history; the file is rewritten shortly after (schedule_save)"""
         try:
-            for search in history:
-                for process in search.get('resultados', []):
-                    if process.get('numeroProcessoUnico') == process_number:
-                        if 'detalhes_processos' not in search:
-                            search['detalhes_processos'] = {}
-                        search['detalhes_processos'][process_number] = details
-
-                        if FileStorage.save_search_history(history):
-                            return True
-                        return False
-            return False
+            search = FileStorage._find_search(process_number, history)
+            if search is None:
+                return False
+
+            if 'detalhes_processos' not in search:
+                search['detalhes_processos'] = {}
+            search['detalhes_processos'][process_number] = details
+
+            FileStorage.schedule_save(history)
+            return True
 
         except Exception as e:
             st.error(f"Error saving process details: {e}")
@@ -6,6 +6,30 @@ import streamlit as st
 from datetime import datetime
 from models.auth import AuthenticationManager
 
+# HTML constante da tela de login, montado uma única vez na importação
+_LOGIN_CSS = """
+<style>
+.login-container {
+    max-width: 400px;
+    margin: 0 auto;
+    padding: 2rem;
+    border-radius: 10px;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+    background-color: #f8f9fa;
+}
+.login-title {
+    text-align: center;
+    color: #1f77b4;
+    margin-bottom: 2rem;
+}
+</style>
+"""
+
+_LOGIN_HEADER = (
+    '<h1 class="login-title">🔐 Login</h1>'
+    '<h3 style="text-align: center; color: #666;">Consulta de Processos Judiciais</h3>'
+)
+
 
 class AuthViewComponents:
     """Componentes de UI para autenticação"""
@@ -13,31 +37,14 @@ class AuthViewComponents:
     @staticmethod
     def render_login_screen():
         """Renderiza tela de login"""
-        st.markdown("""
-        <style>
-        .login-container {
-            max-width: 400px;
-            margin: 0 auto;
-            padding: 2rem;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            background-color: #f8f9fa;
-        }
-        .login-title {
-            text-align: center;
-            color: #1f77b4;
-            margin-bottom: 2rem;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        st.markdown(_LOGIN_CSS, unsafe_allow_html=True)
 
         with st.container():
             _, col2, _ = st.columns([1, 2, 1])
 
             with col2:
                 st.markdown('<div class="login-container">', unsafe_allow_html=True)
-                st.markdown('<h1 class="login-title">🔐 Login</h1>', unsafe_allow_html=True)
-                st.markdown('<h3 style="text-align: center; color: #666;">Consulta de Processos Judiciais</h3>', unsafe_allow_html=True)
+                st.markdown(_LOGIN_HEADER, unsafe_allow_html=True)
                 st.markdown("---")
 
                 username = st.text_input("👤 Usuário:", placeholder="Digite seu nome de usuário")
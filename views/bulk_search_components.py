@@ -4,11 +4,46 @@ Componentes de UI para exibição de resultados de pesquisa em lote
 """
 import streamlit as st
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Tuple
 from controllers.bulk_search import BulkSearchManager
 from utils.data_helpers import DataFormatter
 from views.process_components import ProcessViewComponents
 
+# Grade de métricas do resumo, emitida como um único bloco HTML
+_SUMMARY_METRICS = (
+    ("Total Pesquisado", 'total_searched'),
+    ("✅ Nada Consta", 'nada_consta'),
+    ("⚠️ Com Processos", 'with_processes'),
+    ("📋 Total de Processos", 'total_processes'),
+)
+_METRIC_GRID = (
+    '<div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">{}</div>'
+)
+_METRIC_CELL = (
+    '<div><div style="font-size: 0.875rem; color: #666;">{}</div>'
+    '<div style="font-size: 2.25rem; line-height: 1.2;">{}</div></div>'
+)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _summarize_bulk_results(search_id: str, _bulk_results: Dict) -> Tuple[Dict[str, int], bytes]:
+    """Resumo e CSV de uma pesquisa em lote, calculados uma vez por `search_id`"""
+    manager = BulkSearchManager(results=_bulk_results)
+    return manager.get_summary(), manager.export_results_to_csv_bytes()
+
+
+def _format_cpfs(bulk_results: Dict) -> Dict[str, str]:
+    """Formata uma vez cada CPF presente nos resultados"""
+    cpfs = [*bulk_results['nada_consta'], *bulk_results['found_processes']]
+    cpfs.extend(error['cpf'] for error in bulk_results['errors'])
+    return {cpf: DataFormatter.format_cpf(cpf) for cpf in cpfs}
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _format_cpfs_cached(search_id: str, _bulk_results: Dict) -> Dict[str, str]:
+    """CPFs formatados de uma pesquisa em lote, calculados uma vez por `search_id`"""
+    return _format_cpfs(_bulk_results)
+
 
 class BulkSearchViewComponents:
     """Componentes de UI para resultados de pesquisa em lote"""
@@ -19,26 +54,26 @@ class BulkSearchViewComponents:
         if not bulk_results:
             return
 
-        manager = BulkSearchManager(None)
-        manager.results = bulk_results
-        summary_stats = manager.get_summary()
+        search_id = bulk_results.get('search_id')
+        if search_id:
+            summary_stats, csv_data = _summarize_bulk_results(search_id, bulk_results)
+            formatted = _format_cpfs_cached(search_id, bulk_results)
+        else:
+            manager = BulkSearchManager(results=bulk_results)
+            summary_stats, csv_data = manager.get_summary(), manager.export_results_to_csv_bytes()
+            formatted = _format_cpfs(bulk_results)
 
         # Métricas do resumo
         st.subheader("📊 Resumo da Pesquisa em Lote")
-        col1, col2, col3, col4 = st.columns(4)
-
-        with col1:
-            st.metric("Total Pesquisado", summary_stats['total_searched'])
-        with col2:
-            st.metric("✅ Nada Consta", summary_stats['nada_consta'])
-        with col3:
-            st.metric("⚠️ Com Processos", summary_stats['with_processes'])
-        with col4:
-            st.metric("📋 Total de Processos", summary_stats['total_processes'])
+        st.markdown(
+            _METRIC_GRID.format(''.join(
+                _METRIC_CELL.format(label, summary_stats[key]) for label, key in _SUMMARY_METRICS
+            )),
+            unsafe_allow_html=True
+        )
 
         # Botão de exportação
         if summary_stats['total_searched'] > 0:
-            csv_data = manager.export_results_to_csv()
             st.download_button(
                 label="📥 Baixar Resultados (CSV)",
                 data=csv_data,
@@ -54,10 +89,9 @@ class BulkSearchViewComponents:
             with st.expander(f"✅ Nada Consta ({len(bulk_results['nada_consta'])} CPFs)", expanded=True):
                 st.success(f"**{len(bulk_results['nada_consta'])}** CPFs sem processos judiciais")
 
-                # Exibir CPFs
+                # Exibir CPFs (um único bloco markdown)
                 cpf_list = bulk_results['nada_consta']
-                for cpf in cpf_list:
-                    st.write(f"✓ {DataFormatter.format_cpf(cpf)}")
+                st.markdown("\n\n".join(f"✓ {formatted[cpf]}" for cpf in cpf_list))
 
         # Seção de processos encontrados
         if bulk_results['found_processes']:
@@ -65,12 +99,7 @@ class BulkSearchViewComponents:
             st.subheader(f"⚠️ CPFs com Processos ({len(bulk_results['found_processes'])})")
 
             for cpf, processes in bulk_results['found_processes'].items():
-                with st.expander(f"CPF: {DataFormatter.format_cpf(cpf)} - {len(processes)} processo(s)", expanded=False):
-                    st.warning(f"**{len(processes)} processo(s) judicial(is) encontrado(s) para este CPF**")
-
-                    # Exibir cada processo
-                    for idx, process in enumerate(processes):
-                        ProcessViewComponents.render_process_details(process, idx)
+                BulkSearchViewComponents._render_cpf_processes(cpf, formatted[cpf], processes)
 
         # Seção de erros
         if bulk_results['errors']:
@@ -78,5 +107,21 @@ class BulkSearchViewComponents:
             with st.expander(f"❌ Erros ({len(bulk_results['errors'])})", expanded=False):
                 st.error(f"**{len(bulk_results['errors'])}** CPFs tiveram erros durante a pesquisa")
 
-                for error in bulk_results['errors']:
-                    st.write(f"• {DataFormatter.format_cpf(error['cpf'])}: {error['error']}")
+                st.markdown("\n\n".join(
+                    f"• {formatted[error['cpf']]}: {error['error']}"
+                    for error in bulk_results['errors']
+                ))
+
+    @staticmethod
+    @st.fragment
+    def _render_cpf_processes(cpf: str, formatted_cpf: str, processes: List[Dict]):
+        """Renderiza os processos de um CPF (fragmento: reexecuta isolado)"""
+        with st.expander(f"CPF: {formatted_cpf} - {len(processes)} processo(s)", expanded=False):
+            st.warning(f"**{len(processes)} processo(s) judicial(is) encontrado(s) para este CPF**")
+
+            if len(processes) > 1 and st.button("Obter Detalhes de Todos", key=f"btn_all_details_{cpf}"):
+                ProcessViewComponents.fetch_many_process_details(processes)
+
+            # Exibir cada processo
+            for idx, process in enumerate(processes):
+                ProcessViewComponents.render_process_details(process, idx, f"lote_{cpf}")
@@ -2,111 +2,206 @@
 Componentes de Visualização de Processos
 Componentes de UI para exibição de informações de processos judiciais
 """
+import time
 import streamlit as st
-from typing import Dict, List
+from typing import Dict, List, Optional
+from config.settings import (
+    DETAILS_CACHE_MAX_ITEMS, DETAILS_CACHE_TTL, MOVEMENTS_PAGE_SIZE
+)
 from utils.data_helpers import DataFormatter
-from models.predictus_api import PredictusAPI
+from models.predictus_api import get_api
 from utils.file_storage import FileStorage
+from utils.async_fetcher import fetch_many
+
+
+@st.cache_data(persist="disk", max_entries=DETAILS_CACHE_MAX_ITEMS, show_spinner=False)
+def _cached_process_lookup(process_number: str, period: int) -> Optional[Dict]:
+    """Detalhes de um processo (movimentações já ordenadas), persistidos em disco"""
+    details = get_api().search_by_process_number(process_number)
+    if details is None:
+        # Exceções não são guardadas pelo cache: a falha é tentada de novo
+        raise LookupError(f"Falha ao consultar o processo {process_number}")
+    if not details:
+        return None
+
+    # Cópia: não altera a resposta recebida da API
+    return {
+        **details[0],
+        'movimentos': ProcessViewComponents.sort_movements(details[0].get('movimentos', [])),
+    }
+
+
+def _lookup_process(process_number: str) -> Optional[Dict]:
+    """Consulta com validade de DETAILS_CACHE_TTL (o cache em disco ignora `ttl`)"""
+    return _cached_process_lookup(process_number, int(time.time() // DETAILS_CACHE_TTL))
 
 
 class ProcessViewComponents:
     """Componentes de UI para exibição de processos"""
 
     @staticmethod
-    def render_process_movements(movements: List[Dict]):
-        """Renderiza movimentações do processo"""
+    def sort_movements(movements: List[Dict]) -> List[Dict]:
+        """Ordena movimentações da mais recente para a mais antiga"""
+        # Decorar-ordenar-desdecorar: comparação de tuplas em C, sem função-chave.
+        # -i desempata pela ordem original (mantém a ordenação estável) e
+        # evita comparar os dicionários
+        keyed = [(mov.get('data') or '', -i, mov) for i, mov in enumerate(movements)]
+        keyed.sort(reverse=True)
+        return [mov for _, _, mov in keyed]
+
+    @staticmethod
+    def render_process_movements(
+        movements: List[Dict], widget_key: str, presorted: bool = False,
+        process_number: Optional[str] = None
+    ):
+        """Renderiza movimentações do processo
+
+        `widget_key` identifica esta exibição (visualização, processo e posição) e
+        guarda a paginação de cada uma separadamente.
+        """
         if not movements:
             st.info("Nenhuma movimentação do processo encontrada.")
             return
 
         st.subheader(f"Movimentações do Processo ({len(movements)} movimentações)")
 
-        for mov in sorted(movements, key=lambda x: x.get('data', ''), reverse=True):
-            date = DataFormatter.format_date(mov.get('data'))
-            classification = DataFormatter.clean_text(
-                mov.get('classificacaoCNJ', {}).get('nome', 'N/A')
-            )
-            description = DataFormatter.clean_text(mov.get('descricao', ''))
+        if not presorted:
+            if not process_number:
+                movements = ProcessViewComponents.sort_movements(movements)
+            else:
+                # Ordenação guardada na sessão por processo e quantidade de movimentações
+                sorted_cache = st.session_state.setdefault('sorted_movements', {})
+                cached = sorted_cache.get(process_number)
+                if cached is None or cached[0] != len(movements):
+                    cached = (len(movements), ProcessViewComponents.sort_movements(movements))
+                    sorted_cache[process_number] = cached
+                movements = cached[1]
+
+        # Paginação: só as primeiras movimentações viram expanders
+        pages = st.session_state.setdefault('movements_page', {})
+        limit = pages.get(widget_key, MOVEMENTS_PAGE_SIZE)
+
+        # Referências locais: evitam buscas de atributo a cada movimentação
+        format_date = DataFormatter.format_date
+        clean_text = DataFormatter.clean_text
+
+        for mov in movements[:limit]:
+            cnj = mov.get('classificacaoCNJ') or {}
+            date = format_date(mov.get('data'))
+            classification = clean_text(cnj.get('nome', 'N/A'))
+            description = clean_text(mov.get('descricao', ''))
 
             with st.expander(f"{date} - {classification}", expanded=False):
                 col1, col2 = st.columns(2)
 
-                with col1:
-                    st.write(f"**Índice:** {mov.get('indice', 'N/A')}")
-                    st.write(f"**Código CNJ:** {mov.get('classificacaoCNJ', {}).get('codigoCNJ', '')}")
-
-                with col2:
-                    st.write(f"**Data:** {date}")
-                    st.write(f"**Classificação:** {classification}")
+                # Um markdown por bloco em vez de um st.write por campo
+                col1.markdown(
+                    f"**Índice:** {mov.get('indice', 'N/A')}\n\n"
+                    f"**Código CNJ:** {cnj.get('codigoCNJ', '')}"
+                )
+                col2.markdown(f"**Data:** {date}\n\n**Classificação:** {classification}")
 
                 if description:
-                    st.write("**Descrição:**")
-                    st.write(description)
+                    st.markdown(f"**Descrição:**\n\n{description}")
+
+        remaining = len(movements) - limit
+        if remaining > 0:
+            st.button(
+                f"Mostrar mais {min(remaining, MOVEMENTS_PAGE_SIZE)} de {remaining} movimentações",
+                key=f"btn_more_movements_{widget_key}",
+                on_click=pages.__setitem__,
+                args=(widget_key, limit + MOVEMENTS_PAGE_SIZE)
+            )
 
     @staticmethod
-    def render_process_details(process: Dict, index: int):
-        """Renderiza informações detalhadas do processo"""
+    @st.fragment
+    def render_process_details(process: Dict, index: int, key_prefix: str):
+        """Renderiza informações detalhadas do processo (fragmento: reexecuta isolado)
+
+        `key_prefix` identifica a visualização (resultado individual ou lote), para
+        que o mesmo processo exibido nas duas abas não repita chaves de widgets.
+        """
         process_number = process.get('numeroProcessoUnico', 'N/A')
-        details_key = f"detalhes_{process_number}"
-        has_details = details_key in st.session_state
+        widget_key = f"{key_prefix}_{process_number}_{index}"
+        stored = st.session_state.setdefault('process_details', {}).get(process_number)
+        has_details = stored is not None
 
         # Construir título
         if has_details:
-            movements_count = len(st.session_state[details_key].get('movimentos', []))
+            movements_count = len(stored.get('movimentos', []))
             title_suffix = f" (DETALHES CARREGADOS - {movements_count} movimentações)" if movements_count else " (DETALHES CARREGADOS)"
             title = f"Processo: {process_number}{title_suffix}"
         else:
             title = f"Processo: {process_number}"
 
         with st.expander(title, expanded=False):
+            # O corpo do expander é montado mesmo fechado: só formata sob demanda
+            if not st.toggle("Mostrar detalhes", key=f"exp_open_{widget_key}"):
+                return
+
             # Informações básicas
             col1, col2 = st.columns(2)
 
+            # Cada bloco de campos vira um único markdown em vez de um st.write por linha
             with col1:
                 st.subheader("Informações do Tribunal")
-                st.write(f"**Tribunal:** {DataFormatter.clean_text(process.get('tribunal', 'N/A'))}")
-                st.write(f"**Estado:** {process.get('uf', 'N/A')}")
-                st.write(f"**Órgão Julgador:** {DataFormatter.clean_text(process.get('orgaoJulgador', 'N/A'))}")
-                st.write(f"**Grau:** {process.get('grauProcesso', 'N/A')}")
+                st.markdown("\n\n".join((
+                    f"**Tribunal:** {DataFormatter.clean_text(process.get('tribunal', 'N/A'))}",
+                    f"**Estado:** {process.get('uf', 'N/A')}",
+                    f"**Órgão Julgador:** {DataFormatter.clean_text(process.get('orgaoJulgador', 'N/A'))}",
+                    f"**Grau:** {process.get('grauProcesso', 'N/A')}",
+                )))
 
             with col2:
                 st.subheader("Datas")
-                st.write(f"**Distribuição:** {DataFormatter.format_date(process.get('dataDistribuicao'))}")
-                st.write(f"**Autuação:** {DataFormatter.format_date(process.get('dataAutuacao'))}")
+                st.markdown(
+                    f"**Distribuição:** {DataFormatter.format_date(process.get('dataDistribuicao'))}\n\n"
+                    f"**Autuação:** {DataFormatter.format_date(process.get('dataAutuacao'))}"
+                )
+
+            lines = []
 
             # Classe e assuntos
             process_class = process.get('classeProcessual', {})
             if process_class:
-                st.write(f"**Classe:** {DataFormatter.clean_text(process_class.get('nome', 'N/A'))}")
+                lines.append(f"**Classe:** {DataFormatter.clean_text(process_class.get('nome', 'N/A'))}")
 
             subjects = process.get('assuntosCNJ', [])
             if subjects:
-                st.write("**Assuntos:**")
+                lines.append("**Assuntos:**")
                 for subject in subjects:
                     is_main = "Principal" if subject.get('ePrincipal') else "Secundário"
                     title = DataFormatter.clean_text(subject.get('titulo', 'N/A'))
-                    st.write(f"  {is_main}: {title}")
+                    lines.append(f"  {is_main}: {title}")
 
             # Valor da causa
             case_value = process.get('valorCausa', {})
             if case_value:
-                st.write(f"**Valor da Causa:** {DataFormatter.format_currency(case_value.get('valor'))}")
+                lines.append(f"**Valor da Causa:** {DataFormatter.format_currency(case_value.get('valor'))}")
+
+            if lines:
+                st.markdown("\n\n".join(lines))
 
             # Partes
             st.subheader("Partes")
+            clean_text = DataFormatter.clean_text
+            party_lines = []
             for party in process.get('partes', []):
-                party_type = DataFormatter.clean_text(party.get('tipo', 'N/A'))
-                name = DataFormatter.clean_text(party.get('nome', 'N/A'))
-                doc = party.get('cpf') or party.get('cnpj', '')
+                party_type = clean_text(party.get('tipo', 'N/A'))
+                name = clean_text(party.get('nome', 'N/A'))
+                doc = party.get('cpf') or party.get('cnpj') or ''
                 doc_info = f" (CPF/CNPJ: {doc})" if doc else ""
-                st.write(f"**{party_type}:** {name}{doc_info}")
+                party_lines.append(f"**{party_type}:** {name}{doc_info}")
 
                 # Advogados
                 for lawyer in party.get('advogados', []):
-                    lawyer_name = DataFormatter.clean_text(lawyer.get('nome', 'N/A'))
+                    lawyer_name = clean_text(lawyer.get('nome', 'N/A'))
                     oab = lawyer.get('oab', {})
                     oab_info = f"OAB/{oab.get('uf')}: {oab.get('numero')}" if oab else ""
-                    st.write(f"  {lawyer_name} {oab_info}")
+                    party_lines.append(f"  {lawyer_name} {oab_info}")
+
+            if party_lines:
+                st.markdown("\n\n".join(party_lines))
 
             # URL
             process_url = process.get('urlProcesso')
@@ -114,48 +209,93 @@ class ProcessViewComponents:
                 st.write(f"[Acessar no site do tribunal]({process_url})")
 
             # Movimentações
+            # (detalhes na sessão já têm as movimentações ordenadas)
             movements = process.get('movimentos', [])
+            presorted = False
             if has_details:
-                detailed_movements = st.session_state[details_key].get('movimentos', [])
+                detailed_movements = stored.get('movimentos', [])
                 if len(detailed_movements) > len(movements):
-                    movements = detailed_movements
+                    movements, presorted = detailed_movements, True
 
             if movements:
-                ProcessViewComponents.render_process_movements(movements)
-            else:
-                if st.button("Obter Detalhes", key=f"btn_details_{process_number}_{index}"):
-                    ProcessViewComponents._fetch_process_details(process_number)
+                # Sem número, a ordenação não é guardada na sessão
+                ProcessViewComponents.render_process_movements(
+                    movements, widget_key, presorted, process.get('numeroProcessoUnico')
+                )
+            elif st.button("Obter Detalhes", key=f"btn_details_{widget_key}"):
+                ProcessViewComponents._fetch_process_details(process_number, widget_key)
 
     @staticmethod
-    def _fetch_process_details(process_number: str):
-        """Busca informações detalhadas do processo"""
-        api = st.session_state.get('api') or PredictusAPI()
-        st.session_state.api = api
-
-        with st.spinner("Buscando detalhes..."):
-            details = api.search_by_process_number(process_number)
-
-            if details and len(details) > 0:
-                detailed_process = details[0]
-                details_key = f"detalhes_{process_number}"
-                st.session_state[details_key] = detailed_process
-
-                # Salvar no histórico
-                history = st.session_state.get('historico_pesquisas', [])
-                FileStorage.save_process_details(process_number, detailed_process, history)
-                st.session_state.historico_pesquisas = history
-
-                movements = detailed_process.get('movimentos', [])
-                if movements:
-                    st.success(f"✅ Encontradas {len(movements)} movimentações! 💾 Detalhes salvos.")
-                    ProcessViewComponents.render_process_movements(movements)
-                else:
-                    st.success("✅ Processo consultado e salvo! Sem movimentações adicionais.")
-
-                # Forçar re-renderização
-                update_key = f"update_{process_number}"
-                if update_key not in st.session_state:
-                    st.session_state[update_key] = True
-                    st.rerun()
-            else:
-                st.warning("Não foi possível obter detalhes do processo.")
+    def _fetch_process_details(process_number: str, widget_key: str):
+        """Busca os detalhes do processo e os exibe no próprio fragmento"""
+        # Só este fragmento espera pela consulta; o resto da página não é reexecutado
+        with st.spinner("⏳ Buscando detalhes..."):
+            try:
+                detailed_process = _lookup_process(process_number)
+            except Exception:
+                detailed_process = None
+
+        if not ProcessViewComponents._store_process_details(process_number, detailed_process):
+            st.warning("Não foi possível obter detalhes do processo.")
+            return
+
+        # Exibe o resultado aqui mesmo, sem reexecutar;
+        # o título do processo é atualizado na próxima interação
+        movements = detailed_process.get('movimentos', [])
+        if movements:
+            ProcessViewComponents.render_process_movements(
+                movements, widget_key, presorted=True, process_number=process_number
+            )
+
+    @staticmethod
+    def fetch_many_process_details(processes: List[Dict]):
+        """Busca de uma vez, em paralelo, os detalhes dos processos ainda não consultados"""
+        process_details = st.session_state.setdefault('process_details', {})
+        pending = [
+            number for number in (p.get('numeroProcessoUnico') for p in processes)
+            if number and number not in process_details
+        ]
+        if not pending:
+            return
+
+        with st.spinner(f"⏳ Buscando detalhes de {len(pending)} processo(s)..."):
+            results = {}
+            for number, future in fetch_many(_lookup_process, pending).items():
+                try:
+                    results[number] = future.result()
+                except Exception:
+                    results[number] = None
+
+        stored = sum(
+            ProcessViewComponents._store_process_details(number, details, notify=False)
+            for number, details in results.items()
+        )
+        if stored:
+            st.toast(f"✅ Detalhes de {stored} processo(s) obtidos! 💾 Salvamento no histórico agendado.")
+        if stored < len(results):
+            st.warning(f"Não foi possível obter detalhes de {len(results) - stored} processo(s).")
+
+    @staticmethod
+    def _store_process_details(
+        process_number: str, detailed_process: Optional[Dict], notify: bool = True
+    ) -> bool:
+        """Salva os detalhes obtidos na sessão e no histórico"""
+        if not detailed_process:
+            return False
+
+        st.session_state.setdefault('process_details', {})[process_number] = detailed_process
+        st.session_state.setdefault('sorted_movements', {}).pop(process_number, None)
+
+        # Salvar no histórico
+        history = st.session_state.get('historico_pesquisas', [])
+        FileStorage.save_process_details(process_number, detailed_process, history)
+        st.session_state.historico_pesquisas = history
+        if not notify:
+            return True
+
+        movements = detailed_process.get('movimentos', [])
+        if movements:
+            st.toast(f"✅ Encontradas {len(movements)} movimentações! 💾 Salvamento no histórico agendado.")
+        else:
+            st.toast("✅ Processo consultado! Sem movimentações adicionais. 💾 Salvamento no histórico agendado.")
+        return True